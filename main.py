@@ -3,13 +3,20 @@ import logging
 import re
 import random
 import asyncio
+import hashlib
+import time
+from collections import Counter, defaultdict
 import httpx
+import orjson
+from aiohttp import web
 from dotenv import load_dotenv
 from telegram import Update,InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ChatAction
+from telegram.error import NetworkError, RetryAfter
 
 from telegram.ext import (
     ApplicationBuilder,
+    CallbackQueryHandler,
     CommandHandler,
     MessageHandler,
     ContextTypes,
@@ -20,23 +27,17 @@ from telegram.ext import (
 load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 GOOGLE_AI_KEY = os.getenv("GOOGLE_AI_KEY")
+if not GOOGLE_AI_KEY:
+    raise RuntimeError("❌ Missing GOOGLE_AI_KEY! Put it into your .env")
+# health check port for the web process; only served when set (e.g. by the hosting platform)
+PORT = int(os.getenv("PORT")) if os.getenv("PORT") else None
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [InlineKeyboardButton("🧠 Generate Quiz", callback_data="quiz_start")],
-        [InlineKeyboardButton("ℹ️ Help", callback_data="help_info")],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    await update.message.reply_text(
-        "🎓 Welcome to **Quizify AI** — your AI quiz generator powered by Google Gemini!\n\n"
-        "Type `/quiz <topic>` or click below to get started 👇",
-        parse_mode="Markdown",
-        reply_markup=reply_markup
-    )
 # Safety / batching
 MAX_BATCH_SIZE = 5  # how many quizzes per batch
+MAX_QUIZZES_PER_REQUEST = 20  # upper bound on n in "/quiz n topic"
 DELAY_BETWEEN_BATCHES = 2  # seconds between batches
+MAX_CONCURRENT_SENDS = 3  # parallel send_poll calls, well below Telegram's rate limit
+SEND_RETRIES = 3  # send_poll attempts per quiz before giving up
 
 logging.basicConfig(
     level=logging.INFO,
@@ -44,114 +45,220 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ========== REGEX PATTERNS ==========
+# Compiled once at import; used on every quiz parse and message
+_RE_LABELED_OPTION = re.compile(r"^[ \t]*[A-D][\).:\-]", re.IGNORECASE | re.MULTILINE)
+# One pass over a free-text quiz: a zero-width lookahead captures each relevant
+# line and classifies it (question / strict option / loose option / line with '?'),
+# and the scan then continues through the line to pick up "Correct: B" / "Answer: B".
+_RE_QUIZ_PARSE = re.compile(
+    r"^(?=[ \t]*(?P<line>"
+    r"question[:\-\t ][:\-\t ]*(?P<q>.*?)"
+    r"|[A-D][\).:\-][ \t]*(?P<opt>.+?)"
+    r"|[A-D][ \t]+(?P<loose>.+?)"
+    r"|.*\?.*?"
+    r")[ \t]*$)"
+    r"|correct[:\-\t ]*(?P<correct>[A-D])"
+    r"|answer[:\-\t ]*(?P<answer>[A-D])",
+    re.IGNORECASE | re.MULTILINE,
+)
+_RE_COUNT = re.compile(r"(\d+)\s+quiz")
+
+# Stripping command words from plain messages (longest keywords first)
+_DIGIT_DROP = str.maketrans("", "", "0123456789")
+_KEYWORDS = ("quizzes", "questions", "create", "make", "quiz", "question")
+
 # ========== GOOGLE AI HELPER ==========
-async def ask_google_ai(prompt: str, retries: int = 2, timeout_seconds: int = 40) -> str:
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+GEMINI_HEADERS = {"Content-Type": "application/json", "x-goog-api-key": GOOGLE_AI_KEY}
+
+# One long-lived client so the TLS/TCP connection to Gemini is reused across calls
+GOOGLE_AI_TIMEOUT = 40
+_HTTPX = httpx.AsyncClient(
+    http2=True,
+    timeout=GOOGLE_AI_TIMEOUT,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+)
+
+# Only these are worth retrying; other 4xx will never succeed
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 1.0  # seconds
+MAX_BACKOFF = 30  # seconds
+AI_UNAVAILABLE_MESSAGE = "❌ AI service is unavailable right now. Please try again later."
+
+def retry_delay(attempt: int, retry_after: str | None = None) -> float:
+    """Honor a numeric Retry-After header, otherwise exponential backoff with full jitter."""
+    try:
+        return max(0.0, min(float(retry_after), MAX_BACKOFF))
+    except (TypeError, ValueError):
+        return random.uniform(0, min(2 ** attempt * BACKOFF_BASE, MAX_BACKOFF))
+
+async def ask_google_ai(
+    prompt: str,
+    retries: int = 2,
+    timeout_seconds: int = GOOGLE_AI_TIMEOUT,
+    generation_config: dict | None = None,
+) -> str:
     """
-    Call Google Gemini with basic retry logic.
+    Call Google Gemini, retrying rate limits, 5xx and network errors with backoff.
+    Pass `generation_config` to request e.g. structured JSON output.
     Returns the generated text or an error message.
     """
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-    headers = {"Content-Type": "application/json", "x-goog-api-key": GOOGLE_AI_KEY}
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    if generation_config:
+        payload["generationConfig"] = generation_config
+    body = orjson.dumps(payload)
 
     for attempt in range(1, retries + 2):
         try:
-            async with httpx.AsyncClient(timeout=timeout_seconds) as client:
-                resp = await client.post(url, headers=headers, json=payload)
-                resp.raise_for_status()
-                data = resp.json()
-                text = (
-                    data.get("candidates", [{}])[0]
-                    .get("content", {})
-                    .get("parts", [{}])[0]
-                    .get("text", "")
-                )
-                if text:
-                    return text.strip()
-                else:
-                    logger.warning("Google AI returned empty text.")
-                    return ""
-        except Exception as e:
-            logger.warning(f"Google AI attempt {attempt} failed: {e}")
-            if attempt <= retries:
-                await asyncio.sleep(1 + attempt)  # backoff
+            resp = await _HTTPX.post(GEMINI_URL, headers=GEMINI_HEADERS, content=body, timeout=timeout_seconds)
+            resp.raise_for_status()
+            data = orjson.loads(resp.content)
+            try:
+                text = data["candidates"][0]["content"]["parts"][0]["text"]
+            except (KeyError, IndexError, TypeError):
+                logger.warning(f"Google AI returned malformed response: {data!r}")
+                return ""
+            if text:
+                return text.strip()
             else:
-                logger.error("All Google AI attempts failed.")
-                return "❌ AI service is unavailable right now. Please try again later."
+                logger.warning("Google AI returned empty text.")
+                return ""
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            logger.warning(f"Google AI attempt {attempt} failed with HTTP {status}")
+            if status not in RETRYABLE_STATUS_CODES:
+                return AI_UNAVAILABLE_MESSAGE
+            delay = retry_delay(attempt, e.response.headers.get("Retry-After"))
+        except httpx.TransportError as e:
+            # timeouts and connection errors
+            logger.warning(f"Google AI attempt {attempt} failed: {e!r}")
+            delay = retry_delay(attempt)
+        except Exception as e:
+            logger.error(f"Google AI request failed: {e}")
+            return AI_UNAVAILABLE_MESSAGE
+
+        if attempt > retries:
+            break
+        await asyncio.sleep(delay)
+
+    logger.error("All Google AI attempts failed.")
+    return AI_UNAVAILABLE_MESSAGE
 
 # ========== QUIZ GENERATION ==========
-async def generate_quiz(topic: str):
+# Cache of generated quizzes: prompt fingerprint -> (created_at, [quiz, ...])
+QUIZ_CACHE_TTL = 3600  # seconds
+QUIZ_CACHE_VARIANTS = 10  # quizzes kept per topic before serving from cache
+QUIZ_CACHE_MAX_TOPICS = 500  # least recently used topics are evicted beyond this
+# (dict order doubles as LRU order: most recently used last)
+_QUIZ_CACHE: dict[str, tuple[float, list]] = {}
+_QUIZ_CACHE_LOCK = asyncio.Lock()
+
+# Ask Gemini for structured JSON so quizzes don't need free-text parsing
+QUIZ_GENERATION_CONFIG = {
+    "responseMimeType": "application/json",
+    "responseSchema": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "question": {"type": "string"},
+                "options": {"type": "array", "items": {"type": "string"}, "minItems": 4, "maxItems": 4},
+                "correct_index": {"type": "integer"},
+            },
+            "required": ["question", "options", "correct_index"],
+        },
+    },
+}
+
+def shuffle_quiz(question: str, options: list, correct_index: int):
+    """
+    Shuffle the four options while keeping the correct index aligned.
+    Also trims to Telegram limits (question ~300 chars, options ~100 chars each)
+    so the result can go straight into send_poll.
+    """
+    perm = random.sample(range(4), 4)
+    shuffled_options = [options[i][:100] for i in perm]
+    new_correct = perm.index(correct_index)
+    return question[:300], shuffled_options, new_correct
+
+def quiz_from_json(obj: dict, topic: str):
+    """
+    Build (question, options_list, correct_index) from one structured Gemini item.
+    Raises ValueError unless it has a question, exactly 4 non-empty options and a valid index.
     """
-    Robust parsing:
+    question = obj["question"]
+    options = obj["options"]
+    correct_index = obj["correct_index"]
+    if not isinstance(question, str) or not question.strip():
+        raise ValueError("missing question text")
+    if (
+        not isinstance(options, list)
+        or len(options) != 4
+        or not all(isinstance(opt, str) and opt.strip() for opt in options)
+    ):
+        raise ValueError("options must be a list of 4 non-empty strings")
+    if isinstance(correct_index, bool) or not isinstance(correct_index, int) or not (0 <= correct_index < 4):
+        raise ValueError(f"invalid correct_index {correct_index!r}")
+    return shuffle_quiz(question.strip(), [opt.strip() for opt in options], correct_index)
+
+def parse_quiz(response: str, topic: str):
+    """
+    Fallback for free-text replies. Robust parsing of a single quiz block:
     - handles "Question: ..." or plain lines containing "?"
     - extracts options A-D with flexible separators
     - extracts correct answer (A-D) if provided
     - returns (question, options_list, correct_index)
     """
-    prompt = (
-        f"Create one multiple-choice quiz question about {topic}. "
-        "Return the question, four distinct options labeled A–D, and indicate the correct one.\n"
-        "Preferred format examples:\n"
-        "Question: <text>\nA: option A\nB: option B\nC: option C\nD: option D\nCorrect: B\n\n"
-        "If you deviate, still include a clear question and four labeled options."
-    )
-
-    response = await ask_google_ai(prompt)
-    lines = [ln.strip() for ln in response.splitlines() if ln.strip()]
-
-    # --- Extract question robustly ---
+    # --- Single pass: question, options A-D and correct letter ---
     question = None
-    for line in lines:
-        # if line explicitly starts with "Question" or contains a '?', take it
-        if re.match(r"(?i)^question[:\-\s]", line):
-            question = re.sub(r'(?i)^question[:\-\s]*', '', line).strip()
-            break
-        if "?" in line:
-            # prefer the first reasonable sentence with '?'
-            question = line.strip()
-            break
+    options = []
+    seen_options = set()
+    loose_options = []
+    correct_letter = None
+    answer_letter = None
+    for m in _RE_QUIZ_PARSE.finditer(response):
+        line = m.group("line")
+        if line is not None:
+            # first line starting with "Question" or containing a '?',
+            # even if it also looks like an option (e.g. "A train leaves ... ?")
+            if question is None:
+                if m.group("q") is not None:
+                    question = m.group("q").strip()
+                elif "?" in line:
+                    question = line.strip()
+
+            if m.group("opt") is not None:
+                if len(options) < 4:
+                    options.append(m.group("opt").strip())
+                    seen_options.add(options[-1])
+            elif m.group("loose") is not None:
+                # lines starting with letter + whitespace, e.g., "A Option text"
+                loose_options.append(m.group("loose").strip())
+        elif m.group("correct") is not None:
+            if correct_letter is None:
+                correct_letter = m.group("correct").upper()
+        elif answer_letter is None:
+            # remember "Answer: B" style in case there's no "Correct:" line
+            answer_letter = m.group("answer").upper()
+
     if not question:
         question = f"What is the correct answer about {topic}?"
 
-    # --- Extract options A-D ---
-    options = []
-    opt_pattern = re.compile(r"^[A-D][\).:\-]\s*(.+)$", re.IGNORECASE)
-    for line in lines:
-        m = opt_pattern.match(line)
-        if m:
-            options.append(m.group(1).strip())
+    # If AI used other formats, fall back to the looser matches
+    for text in loose_options:
         if len(options) == 4:
             break
-
-    # If AI used other formats (like "- A) ..."), try looser matching
-    if len(options) < 4:
-        for line in lines:
-            # find lines starting with letter + whitespace, e.g., "A Option text"
-            m = re.match(r"^([A-D])\s+(.+)$", line, re.IGNORECASE)
-            if m:
-                if m.group(2).strip() not in options:
-                    options.append(m.group(2).strip())
-            if len(options) == 4:
-                break
+        if text not in seen_options:
+            options.append(text)
+            seen_options.add(text)
 
     # pad to 4 if needed
     while len(options) < 4:
         options.append(f"{topic} Option {chr(65 + len(options))}")
 
-    # --- Extract correct letter ---
-    correct_letter = None
-    for line in lines:
-        m = re.search(r"correct[:\s\-]*([A-D])", line, re.IGNORECASE)
-        if m:
-            correct_letter = m.group(1).upper()
-            break
     if correct_letter is None:
-        # try "Answer: B" style
-        for line in lines:
-            m = re.search(r"answer[:\s\-]*([A-D])", line, re.IGNORECASE)
-            if m:
-                correct_letter = m.group(1).upper()
-                break
+        correct_letter = answer_letter
 
     if correct_letter is None:
         correct_index = 0
@@ -160,66 +267,286 @@ async def generate_quiz(topic: str):
         if not (0 <= correct_index < 4):
             correct_index = 0
 
-    # --- Shuffle options while keeping correct index aligned ---
-    indexed = list(enumerate(options))  # (original_index, text)
-    random.shuffle(indexed)
-    shuffled_options = [text for (orig_idx, text) in indexed]
-    # find new index where original correct was moved
-    if correct_letter is None:
-        new_correct = 0
-    else:
-        orig_correct = ord(correct_letter) - 65
-        new_correct = next((i for i, (o, _) in enumerate(indexed) if o == orig_correct), 0)
+    return shuffle_quiz(question, options, correct_index)
 
-    return question, shuffled_options, new_correct
+def build_quiz_prompt(topic: str, count: int = 1) -> str:
+    return (
+        f"Create {count} multiple-choice quiz question{'s' if count > 1 else ''} about {topic}. "
+        "Each needs four distinct options and the 0-based index of the correct one."
+    )
 
-# ========== QUIZ SENDER ==========
-async def send_quizzes(update: Update, context: ContextTypes.DEFAULT_TYPE, topic: str, count: int):
-    """Send quizzes as Telegram polls only."""
-    total_sent = 0
-    while total_sent < count:
-        question, options, correct = await generate_quiz(topic)
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+def quiz_cache_key(topic: str) -> str:
+    """Fingerprint of the single-question prompt for a normalized topic."""
+    prompt = build_quiz_prompt(normalize_topic(topic))
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
 
-        # Telegram limits: question ~300 chars, options ~100 chars each
-        safe_question = question[:300]
-        safe_options = [opt[:100] for opt in options]
+async def request_quizzes(topic: str, count: int):
+    """
+    Ask Gemini for `count` questions as structured JSON in a single call.
+    Malformed items are skipped; returns an empty list if the AI is unavailable
+    or the reply can't be used (e.g. JSON cut off mid-way).
+    """
+    response = await ask_google_ai(build_quiz_prompt(topic, count), generation_config=QUIZ_GENERATION_CONFIG)
+    if not response or response == AI_UNAVAILABLE_MESSAGE:
+        return []
 
+    try:
+        items = orjson.loads(response)
+    except orjson.JSONDecodeError as e:
+        # with a JSON response type this is almost always truncated output; only fall back
+        # to free-text parsing if the model really wrote labeled A-D options
+        if len(_RE_LABELED_OPTION.findall(response)) >= 4:
+            return [parse_quiz(response, topic)]
+        logger.warning(f"Structured quiz parsing failed: {e}")
+        return []
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        logger.warning(f"Structured quiz reply is not a list: {items!r}")
+        return []
+
+    quizzes = []
+    for item in items[:count]:
         try:
-            await context.bot.send_poll(
-                chat_id=update.message.chat_id,
-                question=safe_question,
-                options=safe_options,
-                type="quiz",
-                correct_option_id=correct,
-                explanation="Generated by Google Gemini 🤖"
-            )
-            total_sent += 1
+            quizzes.append(quiz_from_json(item, topic))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping malformed quiz item {item!r}: {e}")
+    return quizzes
+
+async def generate_quiz(topic: str, count: int = 1):
+    """
+    Generate `count` questions, asking Gemini for up to MAX_BATCH_SIZE per call.
+    Once a topic has enough cached variants, serves a random pick from the cache instead
+    (sampled once for the whole request, so no quiz repeats).
+    Returns a list of (question, options_list, correct_index) tuples, empty if the AI is unavailable.
+    """
+    key = quiz_cache_key(topic)
+    async with _QUIZ_CACHE_LOCK:
+        entry = _QUIZ_CACHE.get(key)
+        if entry and time.time() - entry[0] < QUIZ_CACHE_TTL:
+            variants = entry[1]
+            if len(variants) >= max(count, QUIZ_CACHE_VARIANTS):
+                _QUIZ_CACHE[key] = _QUIZ_CACHE.pop(key)
+                return random.sample(variants, count)
+
+    quizzes = []
+    while len(quizzes) < count:
+        batch = await request_quizzes(topic, min(MAX_BATCH_SIZE, count - len(quizzes)))
+        if not batch:
+            break
+        quizzes.extend(batch)
+    if not quizzes:
+        return []
+
+    async with _QUIZ_CACHE_LOCK:
+        now = time.time()
+        entry = _QUIZ_CACHE.pop(key, None)
+        if entry and now - entry[0] < QUIZ_CACHE_TTL:
+            created_at, variants = entry
+        else:
+            created_at, variants = now, []
+        variants = (variants + quizzes)[-QUIZ_CACHE_VARIANTS:]
+        _QUIZ_CACHE[key] = (created_at, variants)
+
+        # drop expired topics, then the least recently used ones beyond the cap
+        for stale in [k for k, (ts, _) in _QUIZ_CACHE.items() if now - ts >= QUIZ_CACHE_TTL]:
+            del _QUIZ_CACHE[stale]
+        while len(_QUIZ_CACHE) > QUIZ_CACHE_MAX_TOPICS:
+            del _QUIZ_CACHE[next(iter(_QUIZ_CACHE))]
+
+    return quizzes
+
+# ========== QUIZ POOL ==========
+# Quizzes for popular topics generated ahead of time by a background task
+POPULAR_TOPICS = ("python", "math", "general knowledge")
+POOL_MAX_TOPICS = 10  # popular + most requested topics kept warm
+POOL_BATCH_SIZE = 5  # quizzes per refill call
+POOL_REFILL_INTERVAL = 5  # seconds between refill calls
+POOL_MAX_BACKOFF = 600  # max seconds between refill calls after failures
+POOL_IDLE_SECONDS = 30  # only refill when no quiz request came in for this long
+POOL_MIN_REQUESTS = 3  # requests before a user topic is kept warm
+TOPIC_REQUESTS_MAX = 1000  # distinct topics tracked before trimming
+TOPIC_REQUESTS_KEEP = 100  # most requested topics kept when trimming
+QUIZ_POOL: dict[str, asyncio.Queue] = defaultdict(lambda: asyncio.Queue(maxsize=20))
+TOPIC_REQUESTS: Counter = Counter()  # normalized topic -> number of quiz requests
+_active_quiz_requests = 0
+_last_quiz_request_at = float("-inf")  # time.monotonic() of the last quiz request activity
+
+def pool_is_idle() -> bool:
+    return (
+        _active_quiz_requests == 0
+        and time.monotonic() - _last_quiz_request_at >= POOL_IDLE_SECONDS
+    )
+
+def pool_topics() -> list:
+    topics = list(POPULAR_TOPICS)
+    for topic, requests in TOPIC_REQUESTS.most_common(POOL_MAX_TOPICS):
+        if len(topics) >= POOL_MAX_TOPICS or requests < POOL_MIN_REQUESTS:
+            break
+        if topic not in topics:
+            topics.append(topic)
+    return topics
+
+def record_topic_request(topic: str):
+    """Count a quiz request for `topic`, trimming to the most requested topics when it grows too big."""
+    TOPIC_REQUESTS[normalize_topic(topic)] += 1
+    if len(TOPIC_REQUESTS) > TOPIC_REQUESTS_MAX:
+        kept = TOPIC_REQUESTS.most_common(TOPIC_REQUESTS_KEEP)
+        TOPIC_REQUESTS.clear()
+        TOPIC_REQUESTS.update(dict(kept))
+
+def take_pooled_quizzes(topic: str, count: int) -> list:
+    """Pop up to `count` pre-generated quizzes for `topic` without waiting."""
+    quizzes = []
+    queue = QUIZ_POOL.get(normalize_topic(topic))
+    while queue is not None and len(quizzes) < count and not queue.empty():
+        quizzes.append(queue.get_nowait())
+    return quizzes
+
+async def refill_quiz_pool():
+    """
+    Background task: while users are idle, keep the emptiest popular topic queue topped up.
+    Backs off exponentially after failed or empty refills so it can't eat the Gemini quota.
+    """
+    delay = POOL_REFILL_INTERVAL
+    while True:
+        await asyncio.sleep(delay)
+        topics = pool_topics()
+        # drop queues for topics that are no longer popular enough to keep warm
+        for stale in [t for t in QUIZ_POOL if t not in topics]:
+            del QUIZ_POOL[stale]
+
+        if not pool_is_idle():
+            continue
+        candidates = [t for t in topics if not QUIZ_POOL[t].full()]
+        if not candidates:
+            continue
+
+        topic = min(candidates, key=lambda t: QUIZ_POOL[t].qsize())
+        try:
+            quizzes = await request_quizzes(topic, POOL_BATCH_SIZE)
         except Exception as e:
-            logger.error(f"Quiz sending failed: {e}")
-            await update.message.reply_text("⚠️ Quiz creation failed. Please try again.")
+            logger.error(f"Quiz pool refill failed: {e}")
+            quizzes = None
+        if not quizzes:
+            delay = min(delay * 2, POOL_MAX_BACKOFF)
+            logger.warning(f"Quiz pool refill for '{topic}' got nothing, next try in {delay}s")
+            continue
+
+        delay = POOL_REFILL_INTERVAL
+        for quiz in quizzes:
+            if QUIZ_POOL[topic].full():
+                break
+            QUIZ_POOL[topic].put_nowait(quiz)
 
-    await update.message.reply_text(f"🎉 All {total_sent} quiz{'es' if total_sent > 1 else ''} sent successfully!")
+# ========== QUIZ SENDER ==========
+async def send_quizzes(update: Update, context: ContextTypes.DEFAULT_TYPE, topic: str, count: int):
+    """Send quizzes as Telegram polls only."""
+    global _active_quiz_requests, _last_quiz_request_at
+    _active_quiz_requests += 1
+    _last_quiz_request_at = time.monotonic()
+    try:
+        record_topic_request(topic)
+
+        # Serve pre-generated quizzes first, then generate the rest in one go
+        quizzes = take_pooled_quizzes(topic, count)
+        if len(quizzes) < count:
+            quizzes.extend(await generate_quiz(topic, count - len(quizzes)))
+
+        if not quizzes:
+            await update.message.reply_text(AI_UNAVAILABLE_MESSAGE)
+            return
+
+        sem = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+
+        async def send_one(question, options, correct):
+            for attempt in range(SEND_RETRIES):
+                try:
+                    async with sem:
+                        await context.bot.send_poll(
+                            chat_id=update.message.chat_id,
+                            question=question,
+                            options=options,
+                            type="quiz",
+                            correct_option_id=correct,
+                            explanation="Generated by Google Gemini 🤖"
+                        )
+                    return True
+                except RetryAfter as e:
+                    logger.warning(f"Quiz sending rate limited (attempt {attempt + 1}): {e}")
+                    delay = e.retry_after
+                except NetworkError as e:
+                    # includes TimedOut; other Telegram errors (e.g. BadRequest) won't succeed on retry
+                    logger.warning(f"Quiz sending failed (attempt {attempt + 1}): {e}")
+                    delay = 1 << attempt
+                except Exception as e:
+                    logger.error(f"Quiz sending failed: {e}")
+                    await update.message.reply_text("⚠️ Quiz creation failed. Please try again.")
+                    return False
+                if attempt + 1 < SEND_RETRIES:
+                    await asyncio.sleep(delay)
+            await update.message.reply_text("⚠️ Quiz creation failed after retries.")
+            return False
+
+        results = await asyncio.gather(*(send_one(*quiz) for quiz in quizzes), return_exceptions=True)
+        total_sent = sum(1 for r in results if r is True)
+
+        if total_sent < len(quizzes):
+            await update.message.reply_text(f"⚠️ Sent {total_sent} of {len(quizzes)} quizzes.")
+        else:
+            await update.message.reply_text(f"🎉 All {total_sent} quiz{'es' if total_sent > 1 else ''} sent successfully!")
+    finally:
+        # keeps the background pool refiller out of the way of live requests
+        _active_quiz_requests -= 1
+        _last_quiz_request_at = time.monotonic()
 
 # ========== TELEGRAM HANDLERS ==========
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    keyboard = [
+        [InlineKeyboardButton("🧠 Generate Quiz", callback_data="quiz_start")],
+        [InlineKeyboardButton("ℹ️ Help", callback_data="help_info")],
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
     await update.message.reply_text(
-        "👋 Hi! I’m your AI Quiz Bot powered by Google Gemini.\n\n"
-        "Use /quiz or plain messages like:\n"
-        "• `/quiz Python`\n"
-        "• `/quiz 3 JavaScript`\n"
-        "• `create 3 quizzes about HTML`\nType /help for more."
+        "🎓 Welcome to **Quizify AI** — your AI quiz generator powered by Google Gemini!\n\n"
+        "Type `/quiz <topic>` or click below to get started 👇",
+        parse_mode="Markdown",
+        reply_markup=reply_markup
     )
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
+    await update.effective_message.reply_text(
         "🤖 Commands:\n"
         "/start - Welcome\n"
         "/help - This message\n"
         "/quiz <topic> - Generate 1 quiz\n"
-        "/quiz <n> <topic> - Generate n quizzes\n"
+        f"/quiz <n> <topic> - Generate n quizzes (up to {MAX_QUIZZES_PER_REQUEST})\n"
         "Or use natural phrases: 'create 3 quizzes about Math'"
     )
 
+async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    if query.data == "quiz_start":
+        await query.message.reply_text(
+            "🧠 Send `/quiz <topic>` or `/quiz 3 <topic>`, e.g. `/quiz Python`", parse_mode="Markdown"
+        )
+    elif query.data == "help_info":
+        await help_command(update, context)
+
+async def clamp_quiz_count(update: Update, count: int) -> int:
+    """Keep the requested number of quizzes within 1..MAX_QUIZZES_PER_REQUEST."""
+    if count > MAX_QUIZZES_PER_REQUEST:
+        await update.message.reply_text(
+            f"ℹ️ You can get up to {MAX_QUIZZES_PER_REQUEST} quizzes at a time, sending {MAX_QUIZZES_PER_REQUEST}."
+        )
+        return MAX_QUIZZES_PER_REQUEST
+    return max(count, 1)
+
 async def quiz_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args
     if not args:
@@ -238,6 +565,7 @@ async def quiz_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not topic:
         topic = "General Knowledge"
 
+    count = await clamp_quiz_count(update, count)
     await send_quizzes(update, context, topic, count)
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -246,15 +574,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"User: {user_input}")
 
     # detect number of quizzes like "create 3 quizzes"
-    m = re.search(r"(\d+)\s+quiz", lower)
+    m = _RE_COUNT.search(lower)
     count = int(m.group(1)) if m else 1
 
     # extract topic
-    topic = re.sub(r"(create|make|quiz|quizzes|question|questions|\d+)", "", lower, flags=re.IGNORECASE).strip()
-    if not topic:
-        topic = "General Knowledge"
+    topic = lower.translate(_DIGIT_DROP)
+    for kw in _KEYWORDS:
+        topic = topic.replace(kw, "")
+    topic = " ".join(topic.split()) or "General Knowledge"
 
     if "quiz" in lower or "question" in lower:
+        count = await clamp_quiz_count(update, count)
         await send_quizzes(update, context, topic, count)
     else:
         # chatting fallback to Gemini
@@ -266,9 +596,12 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     logger.error(msg="Exception while handling update:", exc_info=context.error)
 
 # ========== APP STARTUP (async, stable) ==========
+async def health_check(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
 async def main():
-    if not TELEGRAM_BOT_TOKEN or not GOOGLE_AI_KEY:
-        logger.error("❌ Missing API tokens! Put TELEGRAM_BOT_TOKEN and GOOGLE_AI_KEY into your .env")
+    if not TELEGRAM_BOT_TOKEN:
+        logger.error("❌ Missing API token! Put TELEGRAM_BOT_TOKEN into your .env")
         return
 
     app = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
@@ -276,23 +609,49 @@ async def main():
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CommandHandler("quiz", quiz_command))
+    app.add_handler(CallbackQueryHandler(button_handler))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_error_handler(error_handler)
 
-    logger.info("🤖 Starting bot...")
-    await app.initialize()
-    await app.start()
-    # start polling
-    await app.updater.start_polling()
-    logger.info("🚀 Bot is running. Press Ctrl+C to stop.")
-
+    runner = None
     try:
-        await asyncio.Event().wait()  # keep running
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("🛑 Stopping bot...")
-        await app.updater.stop_polling()
-        await app.stop()
-        await app.shutdown()
+        if PORT is not None:
+            # health check endpoint served on the same event loop as the bot
+            health = web.Application()
+            health.add_routes([web.get("/", health_check)])
+            runner = web.AppRunner(health)
+            await runner.setup()
+            await web.TCPSite(runner, "0.0.0.0", PORT).start()
+            logger.info(f"💓 Health check listening on port {PORT}")
+
+        logger.info("🤖 Starting bot...")
+        await app.initialize()
+        await app.start()
+        # start polling
+        await app.updater.start_polling()
+        logger.info("🚀 Bot is running. Press Ctrl+C to stop.")
+
+        refiller = asyncio.create_task(refill_quiz_pool())
+
+        try:
+            await asyncio.Event().wait()  # keep running
+        finally:
+            # asyncio.run() cancels this task on Ctrl+C, so clean up in finally
+            logger.info("🛑 Stopping bot...")
+            refiller.cancel()
+            await app.updater.stop_polling()
+            await app.stop()
+            await app.shutdown()
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        await _HTTPX.aclose()
 
 if __name__ == "__main__":
+    # uvloop is a faster drop-in event loop; fall back to asyncio's default if unavailable
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+for mod in ("httpx", "h2", "orjson", "aiohttp", "telegram", "dotenv"):
+    pytest.importorskip(mod)
+
+os.environ.setdefault("GOOGLE_AI_KEY", "test-key")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+def test_question_starting_with_option_letter():
+    response = (
+        "A train leaves at noon going 60 km/h. How far after 2 hours?\n"
+        "A) 60 km\nB) 120 km\nC) 180 km\nD) 240 km\n"
+        "Correct: B"
+    )
+    question, options, correct = main.parse_quiz(response, "T")
+    assert question == "A train leaves at noon going 60 km/h. How far after 2 hours?"
+    assert sorted(options) == ["120 km", "180 km", "240 km", "60 km"]
+    assert options[correct] == "120 km"
+
+
+def test_question_prefix_and_answer_fallback():
+    response = "Question: What is 2+2?\nA: 3\nB: 4\nC: 5\nD: 6\nAnswer: B"
+    question, options, correct = main.parse_quiz(response, "Math")
+    assert question == "What is 2+2?"
+    assert options[correct] == "4"
+
+
+def test_question_prefix_strips_mixed_separators():
+    response = "Question:- foo?\nA) one\nB) two\nC) three\nD) four\nCorrect: A"
+    question, options, correct = main.parse_quiz(response, "T")
+    assert question == "foo?"
+    assert options[correct] == "one"
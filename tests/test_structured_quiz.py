@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+
+import orjson
+import pytest
+
+for mod in ("httpx", "h2", "aiohttp", "telegram", "dotenv"):
+    pytest.importorskip(mod)
+
+os.environ.setdefault("GOOGLE_AI_KEY", "test-key")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+GOOD = {"question": "What does len([]) return?", "options": ["0", "1", "None", "error"], "correct_index": 0}
+
+
+def fake_ai(reply):
+    async def ask_google_ai(prompt, **kwargs):
+        return reply
+    return ask_google_ai
+
+
+def test_quiz_from_json_keeps_correct_answer():
+    question, options, correct = main.quiz_from_json(GOOD, "Python")
+    assert question == "What does len([]) return?"
+    assert sorted(options) == ["0", "1", "None", "error"]
+    assert options[correct] == "0"
+
+
+@pytest.mark.parametrize(
+    "item",
+    [
+        {**GOOD, "options": ["a", "b", "c", "d", "e"], "correct_index": 4},
+        {**GOOD, "options": ["a", "b"]},
+        {**GOOD, "options": "abcd"},
+        {**GOOD, "options": ["a", "", "c", "d"]},
+        {**GOOD, "correct_index": 4},
+        {**GOOD, "correct_index": "1"},
+        {**GOOD, "question": ""},
+    ],
+)
+def test_quiz_from_json_rejects_malformed_items(item):
+    with pytest.raises(ValueError):
+        main.quiz_from_json(item, "Python")
+
+
+def test_request_quizzes_skips_bad_items(monkeypatch):
+    bad = {k: v for k, v in GOOD.items() if k != "correct_index"}
+    monkeypatch.setattr(main, "ask_google_ai", fake_ai(orjson.dumps([GOOD, bad]).decode()))
+    quizzes = asyncio.run(main.request_quizzes("Python", 2))
+    assert len(quizzes) == 1
+    assert quizzes[0][0] == "What does len([]) return?"
+
+
+@pytest.mark.parametrize(
+    "reply",
+    ['[{"question": "What does len([]) return?", "options": ["0", "1"', '"just a string"', main.AI_UNAVAILABLE_MESSAGE, ""],
+)
+def test_request_quizzes_returns_nothing_for_unusable_replies(monkeypatch, reply):
+    monkeypatch.setattr(main, "ask_google_ai", fake_ai(reply))
+    assert asyncio.run(main.request_quizzes("Python", 1)) == []